@@ -1,11 +1,14 @@
 from fastapi import FastAPI, HTTPException, status, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import List, Optional
-from datetime import date, datetime
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, BeforeValidator, ConfigDict, EmailStr, Field, field_validator, model_validator
+from typing import Annotated, List, Optional
+from datetime import date, datetime, time
 from motor.motor_asyncio import AsyncIOMotorClient
-from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import enum
+import orjson
 import os
 from contextlib import asynccontextmanager
 import os 
@@ -19,12 +22,20 @@ import uvicorn
 
 MONGODB_URL = os.getenv("MONGODB_URL")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "hrms_lite")
+# Pool sizes apply per replica-set member and per worker process
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "1"))
 
 if not MONGODB_URL:
     raise RuntimeError("MONGODB_URL environment variable not set")
 
 mongodb_client: Optional[AsyncIOMotorClient] = None
 database = None
+employees_collection = None
+attendance_collection = None
+
+# Attendance dates are stored as BSON datetimes at midnight
+_MIDNIGHT = time()
 
 # ==============================
 # Enums
@@ -44,12 +55,20 @@ class EmployeeCreate(BaseModel):
     email: EmailStr
     department: str = Field(..., min_length=1, max_length=100)
 
-    @validator("employee_id", "full_name", "department")
+    @model_validator(mode="before")
     @classmethod
-    def no_empty_strings(cls, v):
-        if not v.strip():
-            raise ValueError("Field cannot be empty")
-        return v.strip()
+    def no_empty_strings(cls, data):
+        # One pass over the text fields instead of a validator call per field
+        if isinstance(data, dict):
+            data = dict(data)
+            for field in ("employee_id", "full_name", "department"):
+                value = data.get(field)
+                if isinstance(value, str):
+                    value = value.strip()
+                    if not value:
+                        raise ValueError(f"{field} cannot be empty")
+                    data[field] = value
+        return data
 
 
 class Employee(BaseModel):
@@ -59,9 +78,7 @@ class Employee(BaseModel):
     email: str
     department: str
 
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class AttendanceCreate(BaseModel):
@@ -69,7 +86,7 @@ class AttendanceCreate(BaseModel):
     date: date
     status: AttendanceStatus
 
-    @validator("date")
+    @field_validator("date")
     @classmethod
     def validate_date(cls, v):
         if v > date.today():
@@ -84,9 +101,7 @@ class Attendance(BaseModel):
     status: AttendanceStatus
     employee_name: Optional[str] = None
 
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class AttendanceStats(BaseModel):
@@ -103,17 +118,35 @@ class AttendanceStats(BaseModel):
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global mongodb_client, database
-    mongodb_client = AsyncIOMotorClient(MONGODB_URL)
+    global mongodb_client, database, employees_collection, attendance_collection
+    # minPoolSize keeps warm connections so early requests skip the
+    # TCP/TLS handshake; the timeouts fail fast instead of queueing forever
+    mongodb_client = AsyncIOMotorClient(
+        MONGODB_URL,
+        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+        minPoolSize=MONGODB_MIN_POOL_SIZE,
+        serverSelectionTimeoutMS=3000,
+        waitQueueTimeoutMS=1000,
+        # zstd where the server supports it (4.2+), stdlib zlib otherwise
+        compressors="zstd,zlib",
+    )
     database = mongodb_client[DATABASE_NAME]
+    # Bind the collections once so handlers skip the database lookup
+    employees_collection = database.employees
+    attendance_collection = database.attendance
 
     try:
         await database.command("ping")
-        await database.employees.create_index("employee_id", unique=True)
-        await database.employees.create_index("email", unique=True)
-        await database.attendance.create_index(
+        await employees_collection.create_index("employee_id", unique=True)
+        await employees_collection.create_index("email", unique=True)
+        await attendance_collection.create_index(
             [("employee_id", 1), ("date", 1)], unique=True
         )
+        # Backs the unfiltered date-desc listing; filtered listings and the
+        # stats lookup use the (employee_id, date) index above
+        await attendance_collection.create_index(
+            [("date", -1)], name="att_date_desc"
+        )
         print(".TICK Connected to MongoDB")
     except Exception as e:
         print(".CROSS MongoDB connection failed:", e)
@@ -127,7 +160,7 @@ async def lifespan(app: FastAPI):
 # App
 # ==============================
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -147,9 +180,36 @@ def employee_helper(emp):
 
 def attendance_helper(att):
     att["_id"] = str(att["_id"])
-    att["date"] = att["date"].date()
     return att
 
+def empty_to_none(v):
+    # Unset filters arrive from the frontend as "" and mean "no filter"
+    return v or None
+
+# Query() must sit inside Annotated for FastAPI to keep the validator
+OptionalDateQuery = Annotated[
+    Optional[date], BeforeValidator(empty_to_none), Query()
+]
+
+async def stream_json_array(first, cursor, helper):
+    # Encode rows as the cursor yields them so memory stays flat and the
+    # first bytes go out before the last document is fetched
+    yield b"["
+    if first is not None:
+        yield orjson.dumps(helper(first))
+        async for doc in cursor:
+            yield b"," + orjson.dumps(helper(doc))
+    yield b"]"
+
+async def json_array_response(cursor, helper):
+    # Run the query and read the first batch before the 200 headers are
+    # sent, so connection and query errors still surface as a 500
+    first = await anext(cursor, None)
+    return StreamingResponse(
+        stream_json_array(first, cursor, helper),
+        media_type="application/json",
+    )
+
 # ==============================
 # Routes
 # ==============================
@@ -160,69 +220,54 @@ async def root():
 
 @app.post("/api/employees", response_model=Employee)
 async def create_employee(employee: EmployeeCreate):
-    if await database.employees.find_one({"employee_id": employee.employee_id}):
+    # The unique indexes created in lifespan enforce both constraints, so
+    # let the insert fail instead of pre-checking with extra round-trips
+    employee_dict = employee.model_dump()
+    try:
+        result = await employees_collection.insert_one(employee_dict)
+    except DuplicateKeyError as e:
+        if "email" in (e.details or {}).get("keyPattern", {}):
+            raise HTTPException(400, "Email already exists")
         raise HTTPException(400, "Employee ID already exists")
 
-    if await database.employees.find_one({"email": employee.email}):
-        raise HTTPException(400, "Email already exists")
-
-    result = await database.employees.insert_one(employee.dict())
-    new_emp = await database.employees.find_one({"_id": result.inserted_id})
-    return employee_helper(new_emp)
+    employee_dict["_id"] = result.inserted_id
+    return employee_helper(employee_dict)
 
 @app.get("/api/employees", response_model=List[Employee])
 async def get_employees():
-    employees = []
-    async for emp in database.employees.find():
-        employees.append(employee_helper(emp))
-    return employees
+    # Documents are already in response shape; skip response_model
+    # revalidation (the model still documents the endpoint)
+    return await json_array_response(employees_collection.find(), employee_helper)
 
 
 @app.post("/api/attendance", response_model=Attendance)
 async def mark_attendance(attendance: AttendanceCreate):
-    employee = await database.employees.find_one(
-        {"employee_id": attendance.employee_id}
+    employee = await employees_collection.find_one(
+        {"employee_id": attendance.employee_id}, {"_id": 0, "full_name": 1}
     )
     if not employee:
         raise HTTPException(404, "Employee not found")
 
-    attendance_dict = attendance.model_dump()
-    attendance_dict["date"] = datetime.combine(
-        attendance.date, datetime.min.time()
-    )
-    attendance_dict["status"] = attendance.status.value
-
-    existing = await database.attendance.find_one(
-        {
-            "employee_id": attendance.employee_id,
-            "date": attendance_dict["date"],
-        }
-    )
-
-    if existing:
-        await database.attendance.update_one(
-            {"_id": existing["_id"]},
-            {"$set": {"status": attendance.status.value}},
-        )
-        updated = await database.attendance.find_one(
-            {"_id": existing["_id"]}
-        )
-        updated["employee_name"] = employee["full_name"]
-        return attendance_helper(updated)
+    attendance_date = datetime.combine(attendance.date, _MIDNIGHT)
 
-    result = await database.attendance.insert_one(attendance_dict)
-    new_att = await database.attendance.find_one(
-        {"_id": result.inserted_id}
+    # Insert-or-update in one round-trip, backed by the unique
+    # (employee_id, date) index
+    record = await attendance_collection.find_one_and_update(
+        {"employee_id": attendance.employee_id, "date": attendance_date},
+        {"$set": {"status": attendance.status.value}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
     )
-    new_att["employee_name"] = employee["full_name"]
-    return attendance_helper(new_att)
+    record["date"] = attendance.date
+    record["employee_name"] = employee["full_name"]
+    return attendance_helper(record)
 
 
 @app.get("/api/attendance", response_model=List[Attendance])
 async def get_attendance(
     employee_id: Optional[str] = None,
-    date_from: Optional[str] = Query(None),
-    date_to: Optional[str] = Query(None),
+    date_from: OptionalDateQuery = None,
+    date_to: OptionalDateQuery = None,
 ):
     query = {}
 
@@ -230,72 +275,103 @@ async def get_attendance(
         query["employee_id"] = employee_id
 
     if date_from:
-        date_from_obj = datetime.strptime(date_from, "%Y-%m-%d")
+        date_from_obj = datetime.combine(date_from, _MIDNIGHT)
         query.setdefault("date", {})["$gte"] = date_from_obj
 
     if date_to:
-        date_to_obj = datetime.strptime(date_to, "%Y-%m-%d")
+        date_to_obj = datetime.combine(date_to, _MIDNIGHT)
         query.setdefault("date", {})["$lte"] = date_to_obj
 
-    records = []
-    async for record in database.attendance.find(query).sort("date", -1):
-        emp = await database.employees.find_one(
-            {"employee_id": record["employee_id"]}
-        )
-        record["employee_name"] = emp["full_name"] if emp else None
-        records.append(attendance_helper(record))
+    # Join employee names server-side instead of one find_one per record
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"date": -1}},
+        {
+            "$lookup": {
+                "from": "employees",
+                "localField": "employee_id",
+                "foreignField": "employee_id",
+                "pipeline": [{"$project": {"_id": 0, "full_name": 1}}],
+                "as": "_emp",
+            }
+        },
+        {
+            "$addFields": {
+                "employee_name": {
+                    "$ifNull": [{"$arrayElemAt": ["$_emp.full_name", 0]}, None]
+                },
+                # Format the stored midnight datetime server-side
+                "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}},
+            }
+        },
+        {"$project": {"_emp": 0}},
+    ]
 
-    return records
+    return await json_array_response(
+        attendance_collection.aggregate(pipeline), attendance_helper
+    )
 
 @app.get("/api/attendance/stats", response_model=List[AttendanceStats])
 async def get_attendance_stats():
-    # Use aggregation pipeline for efficient stats calculation
+    # Drive the pipeline from employees so those without attendance records
+    # still come back (zero-filled) in a single round-trip. The $group runs
+    # inside the $lookup so the per-employee attendance array is never built.
     pipeline = [
         {
-            "$group": {
-                "_id": "$employee_id",
-                "total_present": {
-                    "$sum": {"$cond": [{"$eq": ["$status", "Present"]}, 1, 0]}
-                },
-                "total_absent": {
-                    "$sum": {"$cond": [{"$eq": ["$status", "Absent"]}, 1, 0]}
-                },
-                "total_days": {"$sum": 1}
+            "$lookup": {
+                "from": "attendance",
+                "localField": "employee_id",
+                "foreignField": "employee_id",
+                "pipeline": [
+                    {
+                        "$group": {
+                            "_id": None,
+                            "total_present": {
+                                "$sum": {"$cond": [{"$eq": ["$status", "Present"]}, 1, 0]}
+                            },
+                            "total_days": {"$sum": 1}
+                        }
+                    },
+                    # Status is either Present or Absent
+                    {
+                        "$addFields": {
+                            "total_absent": {
+                                "$subtract": ["$total_days", "$total_present"]
+                            }
+                        }
+                    }
+                ],
+                "as": "att"
+            }
+        },
+        {"$unwind": {"path": "$att", "preserveNullAndEmptyArrays": True}},
+        {
+            "$project": {
+                "_id": 0,
+                "employee_id": 1,
+                "employee_name": "$full_name",
+                "total_present": {"$ifNull": ["$att.total_present", 0]},
+                "total_absent": {"$ifNull": ["$att.total_absent", 0]},
+                "total_days": {"$ifNull": ["$att.total_days", 0]}
             }
         }
     ]
-    
-    # Get attendance stats
-    attendance_stats = {}
-    cursor = database.attendance.aggregate(pipeline)
-    async for stat in cursor:
-        attendance_stats[stat["_id"]] = {
-            "total_present": stat["total_present"],
-            "total_absent": stat["total_absent"],
-            "total_days": stat["total_days"]
-        }
-    
-    # Get all employees and combine with stats
-    stats = []
-    cursor = database.employees.find()
-    async for employee in cursor:
-        emp_id = employee["employee_id"]
-        emp_stats = attendance_stats.get(emp_id, {
-            "total_present": 0,
-            "total_absent": 0,
-            "total_days": 0
-        })
-        
-        stats.append(AttendanceStats(
-            employee_id=emp_id,
-            employee_name=employee["full_name"],
-            total_present=emp_stats["total_present"],
-            total_absent=emp_stats["total_absent"],
-            total_days=emp_stats["total_days"]
-        ))
-    
-    return stats
+
+    stats = await employees_collection.aggregate(pipeline).to_list(length=None)
+    # The pipeline's $project already emits the AttendanceStats shape
+    return ORJSONResponse(stats)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    # Multiple workers need the app as an import string; app_dir makes it
+    # importable regardless of the current directory. "auto" picks uvloop
+    # and httptools when they are installed (not on Windows).
+    uvicorn.run(
+        "main:app",
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        host="127.0.0.1",
+        port=8000,
+        loop="auto",
+        http="auto",
+        workers=int(os.getenv("UVICORN_WORKERS", "1")),
+    )
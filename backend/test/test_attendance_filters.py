@@ -0,0 +1,80 @@
+import os
+import sys
+
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = list(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.docs:
+            raise StopAsyncIteration
+        return self.docs.pop(0)
+
+
+class FakeAttendance:
+    def __init__(self):
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        return FakeCursor([])
+
+
+@pytest.fixture
+def attendance(monkeypatch):
+    fake = FakeAttendance()
+    monkeypatch.setattr(main, "attendance_collection", fake)
+    return fake
+
+
+@pytest.fixture
+def client():
+    # Not used as a context manager, so lifespan never connects to MongoDB
+    return TestClient(main.app)
+
+
+def test_empty_filters_are_ignored(client, attendance):
+    response = client.get(
+        "/api/attendance", params={"employee_id": "", "date_from": "", "date_to": ""}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == []
+    assert attendance.pipelines[0][0] == {"$match": {}}
+
+
+def test_date_filters_become_midnight_bounds(client, attendance):
+    response = client.get(
+        "/api/attendance", params={"date_from": "2024-01-01", "date_to": "2024-01-31"}
+    )
+
+    assert response.status_code == 200
+    assert attendance.pipelines[0][0] == {
+        "$match": {
+            "date": {
+                "$gte": datetime(2024, 1, 1),
+                "$lte": datetime(2024, 1, 31),
+            }
+        }
+    }
+
+
+def test_malformed_date_is_rejected(client, attendance):
+    response = client.get("/api/attendance", params={"date_from": "01/02/2024"})
+
+    assert response.status_code == 422
+    assert attendance.pipelines == []